@@ -1,13 +1,15 @@
 # pip install serverchan-sdk
-import requests
+import aiohttp
+import asyncio
 import logging
+import logging.handlers
+import math
 import sqlite3
-import json
+import orjson
 from datetime import datetime, timedelta
 from serverchan_sdk import sc_send
 import os
 import re
-import time
 import pytz
 from config import (
     SERVERCHAN_KEY,
@@ -27,12 +29,80 @@ from config import (
 # 设置北京时区
 BEIJING_TZ = pytz.timezone('Asia/Shanghai')
 
+# 空投时间格式（HH:MM）
+_TIME_RE = re.compile(r'^\d{1,2}:\d{2}$')
+
+
+def _norm(value):
+    """标准化字段值用于比较：字符串去除首尾空白，None 视为空字符串"""
+    if isinstance(value, str):
+        return value.strip()
+    return "" if value is None else str(value).strip()
+
+
+def _integer_affinity(value):
+    """按SQLite INTEGER列的类型亲和性转换值（如 '1'、1.0 都视为 1）"""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                value = float(text)
+            except ValueError:
+                return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# SQL语句（模块级常量，便于sqlite3语句缓存复用）
+SQL_GET_BY_KEYS = '''
+    SELECT k.column1 AS key_index, a.id, a.token, a.date, a.time, a.amount, a.points, a.total_value, a.phase
+    FROM (VALUES {placeholders}) AS k
+    JOIN airdrops AS a ON a.token = k.column2 AND a.date = k.column3 AND a.phase = k.column4
+'''
+
+SQL_UPSERT_AIRDROP = '''
+    INSERT INTO airdrops
+    (token, name, date, time, amount, points, price, total_value, phase, type, status, contract_address, chain_id,
+     notified_new)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(token, date, phase) DO UPDATE
+    SET name = excluded.name, time = excluded.time, amount = excluded.amount, points = excluded.points,
+        price = excluded.price, total_value = excluded.total_value, type = excluded.type,
+        status = excluded.status, contract_address = excluded.contract_address,
+        chain_id = excluded.chain_id, last_updated = CURRENT_TIMESTAMP
+'''
+
+SQL_RECORD_CHANGE = '''
+    INSERT INTO status_changes (airdrop_id, change_type, old_value, new_value)
+    VALUES (?, ?, ?, ?)
+'''
+
+SQL_GET_UPCOMING = '''
+    SELECT id, token, name, date, time, amount, points, price, total_value, phase, type FROM airdrops
+    WHERE date = ? AND time != '' AND time IS NOT NULL AND notified_3min = 0
+'''
+
+SQL_MARK_NOTIFIED_3MIN = 'UPDATE airdrops SET notified_3min = 1 WHERE id = ?'
+
+SQL_GET_HTTP_CACHE = 'SELECT etag, last_modified, body FROM http_cache WHERE url = ?'
+
+SQL_SAVE_HTTP_CACHE = '''
+    INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, updated_at)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+'''
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'),
+        # 每天午夜轮转一次，只保留最近 LOG_RETENTION_DAYS 天的日志
+        logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE, when='midnight', backupCount=LOG_RETENTION_DAYS, encoding='utf-8'
+        ),
         logging.StreamHandler()
     ]
 )
@@ -43,11 +113,20 @@ logging.basicConfig(
 class AirdropMonitor:
     def __init__(self):
         self.conn = None
+        self.session = None
         self.init_database()
     
     def init_database(self):
         """初始化数据库"""
-        self.conn = sqlite3.connect(DB_FILE)
+        self.conn = sqlite3.connect(DB_FILE, cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        # WAL模式减少每次提交的fsync开销
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # 临时表放内存、约20MB页缓存，WAL每1000页自动checkpoint
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-20000")
+        self.conn.execute("PRAGMA wal_autocheckpoint=1000")
         cursor = self.conn.cursor()
         
         # 创建空投记录表
@@ -88,22 +167,78 @@ class AirdropMonitor:
                 FOREIGN KEY (airdrop_id) REFERENCES airdrops (id)
             )
         ''')
-        
+
+        # 创建HTTP缓存表（保存ETag/Last-Modified和响应内容，用于条件请求）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 即将开始空投查询使用的部分索引
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_airdrops_pending
+            ON airdrops (date, notified_3min)
+            WHERE time IS NOT NULL AND time != ''
+        ''')
+
+        # 状态变化记录外键索引
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_status_changes_airdrop
+            ON status_changes (airdrop_id)
+        ''')
+
         self.conn.commit()
         logging.info("数据库初始化完成")
 
-    def fetch_api_data(self):
+    async def start_session(self):
+        """创建HTTP会话（同一进程内的请求共用连接池；cron每次运行都是新进程，不跨次复用）"""
+        self.session = aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+
+    async def fetch_json(self, url):
+        """条件请求获取JSON，内容未变化（304）时复用上次缓存的响应"""
+        cached = self.conn.execute(SQL_GET_HTTP_CACHE, (url,)).fetchone()
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304:
+                # 未发送条件请求头却收到304，没有可复用的缓存内容
+                if not cached:
+                    raise RuntimeError(f"收到304响应但本地没有缓存: {url}")
+                logging.info(f"数据未变化，使用缓存: {url}")
+                body = cached['body']
+            else:
+                response.raise_for_status()
+                body = await response.read()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    with self.conn:
+                        self.conn.execute(SQL_SAVE_HTTP_CACHE, (url, etag, last_modified, body))
+
+        return orjson.loads(body)
+
+    async def fetch_api_data(self):
         """获取API数据"""
         try:
-            # 获取空投数据
-            response = requests.get(DATA_URL, headers=HEADERS, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-
-            # 获取价格数据
-            price_response = requests.get(PRICE_URL, headers=HEADERS, timeout=30)
-            price_response.raise_for_status()
-            price_data = price_response.json()
+            # 并发获取空投数据和价格数据
+            data, price_data = await asyncio.gather(
+                self.fetch_json(DATA_URL),
+                self.fetch_json(PRICE_URL)
+            )
 
             # 调试：打印价格数据结构
             logging.info(f"价格数据类型: {type(price_data)}")
@@ -138,43 +273,43 @@ class AirdropMonitor:
     
     def calculate_value(self, amount, token, prices):
         """计算空投价值"""
-        if not amount or not str(amount).replace('.', '').replace('-', '').isdigit():
+        try:
+            amount_value = float(amount)
+        except (TypeError, ValueError):
+            return None, None
+        if not math.isfinite(amount_value):
             return None, None
         
-        token_price_info = prices.get(str(token), {})
+        token_price_info = prices.get(token)
         if not token_price_info:
             return None, None
         
-        price = token_price_info.get('price', 0)
-        dex_price = token_price_info.get('dex_price', 0)
-        final_price = price if price > 0 else dex_price
-        
+        final_price = token_price_info.get('price') or token_price_info.get('dex_price') or 0
         if final_price <= 0:
             return None, None
         
-        try:
-            total_value = float(amount) * final_price
-            return final_price, total_value
-        except:
-            return final_price, None
+        return final_price, amount_value * final_price
     
-    def get_airdrop_by_key(self, token, date, phase):
-        """根据唯一键获取空投记录"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM airdrops 
-            WHERE token = ? AND date = ? AND phase = ?
-        ''', (token, date, phase))
-        return cursor.fetchone()
+    def get_airdrop_key(self, token, date, phase):
+        """生成空投去重键（按数据库列的类型亲和性归一，避免 '1'、1.0 与 1 被视为不同空投）"""
+        return str(token), str(date), _integer_affinity(phase)
     
-    def insert_new_airdrop(self, airdrop, price, total_value):
-        """插入新空投记录"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO airdrops 
-            (token, name, date, time, amount, points, price, total_value, phase, type, status, contract_address, chain_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    def get_airdrops_by_keys(self, keys):
+        """根据唯一键批量获取空投记录，返回与 keys 顺序一致的列表（不存在为 None）"""
+        existing = [None] * len(keys)
+        if not keys:
+            return existing
+        
+        # 连同序号一起传入，由SQLite按列类型比较后再按序号映射回去
+        placeholders = ', '.join(['(?, ?, ?, ?)'] * len(keys))
+        params = [value for index, key in enumerate(keys) for value in (index, *key)]
+        for row in self.conn.execute(SQL_GET_BY_KEYS.format(placeholders=placeholders), params):
+            existing[row['key_index']] = row
+        return existing
+    
+    def upsert_airdrops(self, airdrops):
+        """批量插入或更新空投记录"""
+        self.conn.executemany(SQL_UPSERT_AIRDROP, [(
             airdrop.get('token'),
             airdrop.get('name'),
             airdrop.get('date'),
@@ -188,44 +323,14 @@ class AirdropMonitor:
             airdrop.get('status'),
             airdrop.get('contract_address'),
             airdrop.get('chain_id')
-        ))
-        self.conn.commit()
-        return cursor.lastrowid
-    
-    def update_airdrop(self, airdrop_id, airdrop, price, total_value):
-        """更新空投记录"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE airdrops 
-            SET name = ?, time = ?, amount = ?, points = ?, price = ?, total_value = ?, 
-                type = ?, status = ?, contract_address = ?, chain_id = ?, last_updated = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (
-            airdrop.get('name'),
-            airdrop.get('time', ''),
-            airdrop.get('amount', ''),
-            airdrop.get('points', ''),
-            price,
-            total_value,
-            airdrop.get('type'),
-            airdrop.get('status'),
-            airdrop.get('contract_address'),
-            airdrop.get('chain_id'),
-            airdrop_id
-        ))
-        self.conn.commit()
+        ) for airdrop, price, total_value in airdrops])
     
     def record_status_change(self, airdrop_id, change_type, old_value, new_value):
         """记录状态变化"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO status_changes (airdrop_id, change_type, old_value, new_value)
-            VALUES (?, ?, ?, ?)
-        ''', (airdrop_id, change_type, str(old_value), str(new_value)))
-        self.conn.commit()
+        cursor = self.conn.execute(SQL_RECORD_CHANGE, (airdrop_id, change_type, str(old_value), str(new_value)))
         return cursor.lastrowid
     
-    def send_notification(self, title, content, tag="空投提醒", priority="normal"):
+    async def send_notification(self, title, content, tag="空投提醒", priority="normal"):
         """发送通知"""
         try:
             # 根据优先级添加emoji
@@ -236,23 +341,22 @@ class AirdropMonitor:
             elif priority == "urgent":
                 title = f"🚨 {title}"
             
-            response = sc_send(SERVERCHAN_KEY, title, content, {"tags": tag})
+            # sc_send 是阻塞调用，放到线程中执行以免阻塞事件循环
+            response = await asyncio.to_thread(sc_send, SERVERCHAN_KEY, title, content, {"tags": tag})
             logging.info(f"通知已发送: {title}")
             return response
         except Exception as e:
             logging.error(f"发送通知失败: {str(e)}", exc_info=True)
             return None
     
-    def format_airdrop_message(self, airdrop_data, show_title=True):
-        """格式化空投消息"""
+    def format_airdrop_message(self, airdrop_data, price, total_value, show_title=True):
+        """格式化空投消息（价格和价值只取显式传入的计算结果，不读取 airdrop_data 中的字段）"""
         token = airdrop_data.get('token', '未知')
         name = airdrop_data.get('name', '未知')
         date = airdrop_data.get('date', '未知')
         time = airdrop_data.get('time', '')
         amount = airdrop_data.get('amount', '')
         points = airdrop_data.get('points', '')
-        price = airdrop_data.get('price')
-        total_value = airdrop_data.get('total_value')
         airdrop_type = airdrop_data.get('type', '未知')
         phase = airdrop_data.get('phase', '未知')
         
@@ -282,35 +386,31 @@ class AirdropMonitor:
         
         return msg
     
-    def check_and_notify_new(self, airdrop, price, total_value):
-        """检查并通知新空投"""
-        token = airdrop.get('token')
-        date = airdrop.get('date')
-        phase = airdrop.get('phase')
-        
-        existing = self.get_airdrop_by_key(token, date, phase)
+    async def notify_new_airdrops(self, new_airdrops):
+        """汇总通知本轮发现的新空投"""
+        if not new_airdrops:
+            return
         
-        if existing is None:
-            # 新空投
-            airdrop_id = self.insert_new_airdrop(airdrop, price, total_value)
-            
-            # 立即通知新空投
-            airdrop_data = {**airdrop, 'price': price, 'total_value': total_value}
-            priority = self.get_priority_by_value(total_value)
-            
-            title = f"新空投发现: {airdrop.get('name')}"
-            content = self.format_airdrop_message(airdrop_data)
-            self.send_notification(title, content, tag="新空投", priority=priority)
-            
-            # 标记已通知
-            cursor = self.conn.cursor()
-            cursor.execute('UPDATE airdrops SET notified_new = 1 WHERE id = ?', (airdrop_id,))
-            self.conn.commit()
-            
-            logging.info(f"发现新空投: {token} - {airdrop.get('name')}, 价值等级: {priority}")
-            return airdrop_id, True
+        if len(new_airdrops) == 1:
+            title = f"新空投发现: {new_airdrops[0][0].get('name')}"
         else:
-            return existing[0], False
+            title = f"新空投发现: {len(new_airdrops)} 个"
+        
+        content = "\n---\n\n".join(
+            self.format_airdrop_message(airdrop, price, total_value)
+            for airdrop, price, total_value in new_airdrops
+        )
+        
+        priority = self.get_priority_by_value(self.get_max_value(total_value for _, _, total_value in new_airdrops))
+        await self.send_notification(title, content, tag="新空投", priority=priority)
+        
+        for airdrop, _, total_value in new_airdrops:
+            logging.info(f"发现新空投: {airdrop.get('token')} - {airdrop.get('name')}, "
+                         f"价值等级: {self.get_priority_by_value(total_value)}")
+    
+    def get_max_value(self, values):
+        """获取最大价值（忽略未知价值）"""
+        return max((value for value in values if value is not None), default=None)
     
     def get_priority_by_value(self, total_value):
         """根据价值获取优先级"""
@@ -328,11 +428,11 @@ class AirdropMonitor:
         changes = []
         
         # 检查时间变化 - 任何时候变化都要通知（最重要）
-        old_time = old_data[4] if old_data[4] else ""
+        old_time = old_data['time'] if old_data['time'] else ""
         new_time = new_airdrop.get('time', '')
         # 标准化比较
-        old_time_normalized = str(old_time).strip()
-        new_time_normalized = str(new_time).strip()
+        old_time_normalized = _norm(old_time)
+        new_time_normalized = _norm(new_time)
         if old_time_normalized != new_time_normalized and new_time_normalized:
             change_id = self.record_status_change(airdrop_id, 'time_updated', old_time, new_time)
             if old_time_normalized:
@@ -355,10 +455,10 @@ class AirdropMonitor:
         # 不再监控价格变化，避免过多通知
         
         # 检查数量变化 - 只在从无到有时通知
-        old_amount = old_data[5] if old_data[5] else ""
+        old_amount = old_data['amount'] if old_data['amount'] else ""
         new_amount = new_airdrop.get('amount', '')
-        old_amount_normalized = str(old_amount).strip()
-        new_amount_normalized = str(new_amount).strip()
+        old_amount_normalized = _norm(old_amount)
+        new_amount_normalized = _norm(new_amount)
         # 只有从空到有值时才通知
         if not old_amount_normalized and new_amount_normalized:
             change_id = self.record_status_change(airdrop_id, 'amount_updated', old_amount, new_amount)
@@ -370,10 +470,10 @@ class AirdropMonitor:
             })
         
         # 检查分数门槛变化 - 只在从无到有时通知
-        old_points = old_data[6] if old_data[6] else ""
+        old_points = old_data['points'] if old_data['points'] else ""
         new_points = new_airdrop.get('points', '')
-        old_points_normalized = str(old_points).strip()
-        new_points_normalized = str(new_points).strip()
+        old_points_normalized = _norm(old_points)
+        new_points_normalized = _norm(new_points)
         # 只有从空到有值时才通知
         if not old_points_normalized and new_points_normalized:
             change_id = self.record_status_change(airdrop_id, 'points_updated', old_points, new_points)
@@ -384,8 +484,8 @@ class AirdropMonitor:
                 'message': f"分数门槛已确定: {new_points}"
             })
         
-        # 检查价值变化 - 只在从无到有时通知
-        old_total_value = old_data[8]
+        # 检查价值变化 - 只在从无到有时通知（REAL列，直接按数值比较）
+        old_total_value = old_data['total_value']
         if old_total_value is None and new_total_value is not None and new_total_value > 0:
             change_id = self.record_status_change(airdrop_id, 'value_updated', 'None', new_total_value)
             changes.append({
@@ -397,44 +497,45 @@ class AirdropMonitor:
         
         return changes
     
-    def notify_status_changes(self, airdrop, changes, price, total_value):
-        """通知状态变化"""
-        if not changes:
+    async def notify_status_changes(self, status_changes):
+        """汇总通知本轮空投的状态变化"""
+        if not status_changes:
             return
         
-        title = f"状态更新: {airdrop.get('name')}"
-        content = f"### {airdrop.get('name')} ({airdrop.get('token')})\n\n"
-        content += "**变化内容:**\n\n"
+        if len(status_changes) == 1:
+            title = f"状态更新: {status_changes[0][0].get('name')}"
+        else:
+            title = f"状态更新: {len(status_changes)} 个空投"
         
-        for change in changes:
-            content += f"- {change['message']}\n"
+        sections = []
+        for airdrop, changes, price, total_value in status_changes:
+            section = f"### {airdrop.get('name')} ({airdrop.get('token')})\n\n"
+            section += "**变化内容:**\n\n"
+            
+            for change in changes:
+                section += f"- {change['message']}\n"
+            
+            section += f"\n**当前信息:**\n\n"
+            section += self.format_airdrop_message(airdrop, price, total_value, show_title=False)
+            sections.append(section)
         
-        content += f"\n---\n\n**当前信息:**\n\n"
-        airdrop_data = {**airdrop, 'price': price, 'total_value': total_value}
-        content += self.format_airdrop_message(airdrop_data, show_title=False)
+        content = "\n---\n\n".join(sections)
         
-        priority = self.get_priority_by_value(total_value)
-        self.send_notification(title, content, tag="状态变化", priority=priority)
+        priority = self.get_priority_by_value(self.get_max_value(total_value for _, _, _, total_value in status_changes))
+        await self.send_notification(title, content, tag="状态变化", priority=priority)
         
-        logging.info(f"状态变化通知: {airdrop.get('name')}, 变化数: {len(changes)}")
+        for airdrop, changes, _, _ in status_changes:
+            logging.info(f"状态变化通知: {airdrop.get('name')}, 变化数: {len(changes)}")
     
-    def check_upcoming_airdrops(self):
+    def check_upcoming_airdrops(self, now):
         """检查即将开始的空投（10分钟内）"""
-        now = self.get_beijing_time()
-        cursor = self.conn.cursor()
-        
         # 查找今天有时间且未提醒的空投
-        cursor.execute('''
-            SELECT * FROM airdrops 
-            WHERE date = ? AND time != '' AND time IS NOT NULL AND notified_3min = 0
-        ''', (now.strftime('%Y-%m-%d'),))
-        
-        airdrops = cursor.fetchall()
+        airdrops = self.conn.execute(SQL_GET_UPCOMING, (now.strftime('%Y-%m-%d'),)).fetchall()
         upcoming_airdrops = []
         
         for airdrop in airdrops:
-            date_str = airdrop[3]
-            time_str = airdrop[4]
+            date_str = airdrop['date']
+            time_str = airdrop['time']
             
             try:
                 # 解析空投时间（使用北京时区）
@@ -449,29 +550,27 @@ class AirdropMonitor:
                         'datetime': airdrop_datetime,
                         'time_diff_minutes': time_diff_minutes
                     })
-                    logging.info(f"发现即将开始的空投: {airdrop[2]}, 剩余 {time_diff_minutes:.1f} 分钟")
+                    logging.info(f"发现即将开始的空投: {airdrop['name']}, 剩余 {time_diff_minutes:.1f} 分钟")
             except Exception as e:
                 logging.error(f"解析时间失败: {date_str} {time_str}, 错误: {str(e)}")
         
         return upcoming_airdrops
     
-    def wait_and_send_reminders(self, airdrop_info):
+    async def wait_and_send_reminders(self, airdrop_info):
         """等待并发送连续提醒"""
         airdrop = airdrop_info['airdrop']
         airdrop_datetime = airdrop_info['datetime']
         
-        airdrop_id = airdrop[0]
+        airdrop_id = airdrop['id']
         airdrop_data = {
-            'token': airdrop[1],
-            'name': airdrop[2],
-            'date': airdrop[3],
-            'time': airdrop[4],
-            'amount': airdrop[5],
-            'points': airdrop[6],
-            'price': airdrop[7],
-            'total_value': airdrop[8],
-            'phase': airdrop[9],
-            'type': airdrop[10]
+            'token': airdrop['token'],
+            'name': airdrop['name'],
+            'date': airdrop['date'],
+            'time': airdrop['time'],
+            'amount': airdrop['amount'],
+            'points': airdrop['points'],
+            'phase': airdrop['phase'],
+            'type': airdrop['type']
         }
         
         # 计算需要等待的时间（等到开始前3分钟）
@@ -480,46 +579,46 @@ class AirdropMonitor:
         wait_seconds = (reminder_time - now).total_seconds()
         
         if wait_seconds > 0:
-            logging.info(f"等待 {wait_seconds:.0f} 秒后发送提醒: {airdrop[2]}")
-            time.sleep(wait_seconds)
+            logging.info(f"等待 {wait_seconds:.0f} 秒后发送提醒: {airdrop['name']}")
+            await asyncio.sleep(wait_seconds)
         
         # 连续发送3条提醒
         for i in range(REMINDER_COUNT):
             now = self.get_beijing_time()
             remaining_minutes = (airdrop_datetime - now).total_seconds() / 60
             
-            title = f"🚨 空投提醒 ({i+1}/{REMINDER_COUNT}): {airdrop[2]}"
+            title = f"🚨 空投提醒 ({i+1}/{REMINDER_COUNT}): {airdrop['name']}"
             content = f"## ⏰ 空投即将在 {remaining_minutes:.1f} 分钟后开始！\n\n"
             content += f"**这是第 {i+1} 次提醒（共 {REMINDER_COUNT} 次）**\n\n"
-            content += self.format_airdrop_message(airdrop_data)
+            content += self.format_airdrop_message(airdrop_data, airdrop['price'], airdrop['total_value'])
             
-            self.send_notification(title, content, tag="紧急提醒", priority="urgent")
-            logging.info(f"已发送第 {i+1}/{REMINDER_COUNT} 次提醒: {airdrop[2]}")
+            await self.send_notification(title, content, tag="紧急提醒", priority="urgent")
+            logging.info(f"已发送第 {i+1}/{REMINDER_COUNT} 次提醒: {airdrop['name']}")
             
             # 如果不是最后一次，等待间隔时间
             if i < REMINDER_COUNT - 1:
-                time.sleep(REMINDER_INTERVAL)
+                await asyncio.sleep(REMINDER_INTERVAL)
         
-        # 标记已提醒
-        cursor = self.conn.cursor()
-        cursor.execute('UPDATE airdrops SET notified_3min = 1 WHERE id = ?', (airdrop_id,))
-        self.conn.commit()
-        logging.info(f"已完成所有提醒并标记: {airdrop[2]}")
+        # 标记已提醒（立即提交，不受其他空投提醒任务影响）
+        with self.conn:
+            self.conn.execute(SQL_MARK_NOTIFIED_3MIN, (airdrop_id,))
+        logging.info(f"已完成所有提醒并标记: {airdrop['name']}")
     
     def get_beijing_time(self):
         """获取北京时间"""
         return datetime.now(BEIJING_TZ)
 
-    def is_airdrop_expired(self, airdrop):
+    def is_airdrop_expired(self, airdrop, now, today_date=None):
         """检查空投是否已过期"""
         date_str = airdrop.get('date')
-        time_str = airdrop.get('time', '')
+        time_str = str(airdrop.get('time') or '').strip()
 
         if not date_str:
             return False
 
         try:
-            now = self.get_beijing_time()
+            if today_date is None:
+                today_date = now.date()
 
             # 首先检查日期格式是否正确
             try:
@@ -529,9 +628,9 @@ class AirdropMonitor:
                 return False
 
             # 如果有具体时间且是有效的时间格式（HH:MM）
-            if time_str and time_str.strip():
+            if time_str:
                 # 检查是否是有效的时间格式，过滤掉 "Delay" 等非时间字符串
-                if re.match(r'^\d{1,2}:\d{2}$', time_str.strip()):
+                if _TIME_RE.match(time_str):
                     try:
                         airdrop_datetime_naive = datetime.strptime(f"{date_str} {time_str}", '%Y-%m-%d %H:%M')
                         airdrop_datetime = BEIJING_TZ.localize(airdrop_datetime_naive)
@@ -541,16 +640,16 @@ class AirdropMonitor:
                     except ValueError:
                         logging.warning(f"时间解析失败: {date_str} {time_str}")
                         # 时间格式无效，只比较日期
-                        if now.date() > airdrop_date:
+                        if today_date > airdrop_date:
                             return True
                 else:
                     # 不是有效时间格式，只比较日期
                     logging.debug(f"跳过无效时间格式: {time_str}")
-                    if now.date() > airdrop_date:
+                    if today_date > airdrop_date:
                         return True
             else:
                 # 如果没有具体时间，只比较日期
-                if now.date() > airdrop_date:
+                if today_date > airdrop_date:
                     return True
 
             return False
@@ -558,87 +657,126 @@ class AirdropMonitor:
             logging.error(f"检查过期时间失败: {date_str} {time_str}, 错误: {str(e)}")
             return False
     
-    def process_airdrops(self):
+    async def process_airdrops(self):
         """处理所有空投"""
         try:
-            airdrops, prices = self.fetch_api_data()
+            airdrops, prices = await self.fetch_api_data()
             
             now = self.get_beijing_time()
+            today_date = now.date()
             today = now.strftime('%Y-%m-%d')
-            today_airdrops = [a for a in airdrops if a.get('date') == today]
+            
+            # 按日期分组，后续按日期取用无需重复扫描
+            airdrops_by_date = {}
+            for airdrop in airdrops:
+                airdrops_by_date.setdefault(airdrop.get('date'), []).append(airdrop)
+            today_airdrops = airdrops_by_date.get(today, [])
             
             logging.info(f"今天共有 {len(today_airdrops)} 个空投")
             
-            active_count = 0
+            # 按唯一键去重，同一空投在数据中重复出现时以最后一条为准
+            active_airdrops = {}
             expired_count = 0
             
             for airdrop in today_airdrops:
                 # 检查空投是否已过期
-                if self.is_airdrop_expired(airdrop):
+                if self.is_airdrop_expired(airdrop, now, today_date):
                     expired_count += 1
                     logging.info(f"跳过已过期空投: {airdrop.get('name')} - {airdrop.get('time')}")
                     continue
                 
-                active_count += 1
+                # 代币统一转为字符串（与价格表的键一致），只转换一次
                 token = airdrop.get('token')
-                date = airdrop.get('date')
-                phase = airdrop.get('phase')
-                amount = airdrop.get('amount')
+                if token is not None and not isinstance(token, str):
+                    token = airdrop['token'] = str(token)
                 
                 # 计算价值
-                price, total_value = self.calculate_value(amount, token, prices)
+                price, total_value = self.calculate_value(airdrop.get('amount'), token, prices)
+                key = self.get_airdrop_key(token, airdrop.get('date'), airdrop.get('phase'))
+                active_airdrops[key] = (airdrop, price, total_value)
+            
+            active_count = len(active_airdrops)
+            
+            # 本轮的新空投和状态变化汇总后统一通知
+            new_airdrops = []
+            status_changes = []
+            
+            # 所有写入放在同一个事务中，结束时统一提交
+            with self.conn:
+                # 一次查询取出已有记录，用于判断新空投和比对状态变化
+                active_list = list(active_airdrops.values())
+                existing_airdrops = self.get_airdrops_by_keys([
+                    (airdrop.get('token'), airdrop.get('date'), airdrop.get('phase'))
+                    for airdrop, _, _ in active_list
+                ])
                 
-                # 检查是否为新空投
-                airdrop_id, is_new = self.check_and_notify_new(airdrop, price, total_value)
+                # 批量写入数据库
+                self.upsert_airdrops(active_list)
                 
-                # 如果不是新空投，检查状态变化
-                if not is_new:
-                    old_data = self.get_airdrop_by_key(token, date, phase)
-                    changes = self.check_status_changes(airdrop_id, old_data, airdrop, price, total_value)
+                for (airdrop, price, total_value), existing in zip(active_list, existing_airdrops):
                     
-                    # 更新数据库
-                    self.update_airdrop(airdrop_id, airdrop, price, total_value)
+                    # 新空投
+                    if existing is None:
+                        new_airdrops.append((airdrop, price, total_value))
+                        continue
                     
-                    # 如果有变化，发送通知
+                    # 不是新空投，检查状态变化
+                    changes = self.check_status_changes(existing['id'], existing, airdrop, price, total_value)
                     if changes:
-                        self.notify_status_changes(airdrop, changes, price, total_value)
+                        status_changes.append((airdrop, changes, price, total_value))
+            
+            # 每类通知本轮只发送一次，两类通知并发发送
+            await asyncio.gather(
+                self.notify_new_airdrops(new_airdrops),
+                self.notify_status_changes(status_changes)
+            )
             
             # 检查即将开始的空投（10分钟内）
-            upcoming_airdrops = self.check_upcoming_airdrops()
+            upcoming_airdrops = self.check_upcoming_airdrops(now)
             
             logging.info(f"本轮监控完成 - 活跃: {active_count}, 已过期: {expired_count}, 即将开始: {len(upcoming_airdrops)}")
             
             # 如果有即将开始的空投，等待并发送连续提醒
             if upcoming_airdrops:
                 logging.info(f"发现 {len(upcoming_airdrops)} 个即将开始的空投，进入等待提醒模式")
-                for upcoming in upcoming_airdrops:
-                    self.wait_and_send_reminders(upcoming)
+                # 并发等待，避免多个空投的提醒相互阻塞；单个任务失败不影响其他提醒
+                results = await asyncio.gather(
+                    *[self.wait_and_send_reminders(upcoming) for upcoming in upcoming_airdrops],
+                    return_exceptions=True
+                )
+                for upcoming, result in zip(upcoming_airdrops, results):
+                    if isinstance(result, Exception):
+                        logging.error(f"发送提醒失败: {upcoming['airdrop']['name']}, 错误: {str(result)}",
+                                      exc_info=result)
             
         except Exception as e:
             logging.error(f"处理空投时出错: {str(e)}", exc_info=True)
-            self.send_notification(
+            await self.send_notification(
                 "监控程序错误", 
                 f"处理空投数据时发生错误:\n\n{str(e)}", 
                 tag="系统错误",
                 priority="high"
             )
     
-    def close(self):
-        """关闭数据库连接"""
+    async def close(self):
+        """关闭HTTP会话和数据库连接"""
+        if self.session:
+            await self.session.close()
         if self.conn:
             self.conn.close()
 
 
-def main():
+async def main():
     """主函数"""
     monitor = AirdropMonitor()
     try:
-        monitor.process_airdrops()
+        await monitor.start_session()
+        await monitor.process_airdrops()
     except Exception as e:
         logging.error(f"程序执行失败: {str(e)}", exc_info=True)
     finally:
-        monitor.close()
+        await monitor.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file